@@ -19,17 +19,18 @@ from __future__ import division
 from __future__ import print_function
 
 import collections
+import re
 import six
 
 from tensorflow.python.framework import ops
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import io_ops
 from tensorflow.python.ops import resource_variable_ops
 from tensorflow.python.ops import state_ops
-from tensorflow.python.ops import variable_scope
 from tensorflow.python.ops import variables as variables_lib
 from tensorflow.python.platform import tf_logging as logging
 from tensorflow.python.training import checkpoint_ops
 from tensorflow.python.training import checkpoint_utils
-from tensorflow.python.training import saver
 
 
 class _VocabInfo(
@@ -40,6 +41,7 @@ class _VocabInfo(
         "old_vocab",
         "old_vocab_size",
         "backup_initializer",
+        "max_rows_in_memory",
     ])):
   """Vocabulary information for _WarmStartSettings.
 
@@ -58,7 +60,13 @@ class _VocabInfo(
     backup_initializer: [Optional] A variable initializer used for variables
       corresponding to new vocabulary entries and OOV. If not provided, these
       entries will be zero-initialized.
+    max_rows_in_memory: [Optional] An integer specifying the maximum number of
+      rows of the old tensor to load from the checkpoint at once. If not
+      provided (or <= 0), the entire tensor is loaded at once. Setting this
+      trades increased disk reads for lower peak memory usage when warm-starting
+      large embeddings.
   """
+  __slots__ = ()
 
   def __new__(cls,
               new_vocab,
@@ -66,7 +74,8 @@ class _VocabInfo(
               num_oov_buckets,
               old_vocab,
               old_vocab_size=-1,
-              backup_initializer=None):
+              backup_initializer=None,
+              max_rows_in_memory=-1):
     return super(_VocabInfo, cls).__new__(
         cls,
         new_vocab,
@@ -74,7 +83,8 @@ class _VocabInfo(
         num_oov_buckets,
         old_vocab,
         old_vocab_size,
-        backup_initializer,)
+        backup_initializer,
+        max_rows_in_memory,)
 
 
 class _WarmStartSettings(
@@ -197,6 +207,7 @@ class _WarmStartSettings(
               "old_tensor_name"
       })
   """
+  __slots__ = ()
 
   def __new__(cls,
               ckpt_to_initialize_from,
@@ -215,8 +226,57 @@ class _WarmStartSettings(
 
 
 def _is_variable(x):
-  return (isinstance(x, variables_lib.Variable) or
-          isinstance(x, resource_variable_ops.ResourceVariable))
+  # Note that `ResourceVariable` is a subclass of `Variable`.
+  return isinstance(x, variables_lib.Variable)
+
+
+def _get_checkpoint_file(ckpt_dir_or_file):
+  """Returns the checkpoint file given a directory or a specific checkpoint.
+
+  Args:
+    ckpt_dir_or_file: A string specifying the directory with checkpoint file(s)
+      or path to checkpoint.
+
+  Returns:
+    Path to the checkpoint; the latest one if `ckpt_dir_or_file` is a directory.
+
+  Raises:
+    ValueError: If `ckpt_dir_or_file` resolves to a directory with no
+      checkpoints.
+  """
+  ckpt_file = checkpoint_utils._get_checkpoint_filename(ckpt_dir_or_file)  # pylint: disable=protected-access
+  if ckpt_file is None:
+    raise ValueError("Couldn't find 'checkpoint' file or checkpoints in "
+                     "given directory %s" % ckpt_dir_or_file)
+  return ckpt_file
+
+
+def _get_var_list(var):
+  """Returns `var` as a list of `Variable`s.
+
+  Args:
+    var: Can be either of the following:
+      (i) `Variable`
+      (ii) `ResourceVariable`
+      (iii) list of `Variable`: The list must contain slices of the same larger
+        variable.
+      (iv) `PartitionedVariable`
+
+  Returns:
+    `[var]` for a single variable, or the list of slices that make up `var`.
+
+  Raises:
+    TypeError: If `var` is none of the above.
+  """
+  if _is_variable(var):
+    return [var]
+  if isinstance(var, list) and all(_is_variable(v) for v in var):
+    return var
+  if isinstance(var, variables_lib.PartitionedVariable):
+    return var._get_variable_list()  # pylint: disable=protected-access
+  raise TypeError(
+      "var MUST be one of the following: a Variable, list of Variable or "
+      "PartitionedVariable, but is {}".format(type(var)))
 
 
 def _infer_var_name(var):
@@ -232,12 +292,32 @@ def _infer_var_name(var):
 
   Returns:
     Name of the `var`
+
+  Raises:
+    TypeError: If `var` is not a list, or its entries do not all share the same
+      name.
   """
-  name_to_var_dict = saver.BaseSaverBuilder.OpListToDict(var)
-  if len(name_to_var_dict) > 1:
-    raise TypeError("`var` = %s passed as arg violates the constraints.  "
-                    "name_to_var_dict = %s" % (var, name_to_var_dict))
-  return list(name_to_var_dict.keys())[0]
+  # This mirrors the naming done by `saver.BaseSaverBuilder.OpListToDict`,
+  # without building slice specs or converting variables to tensors (which adds
+  # read ops to the graph for `ResourceVariable`s).
+  if not isinstance(var, (list, tuple)):
+    raise TypeError("`var` should be passed as a list: %s" % var)
+  var_name = None
+  for v in var:
+    # pylint: disable=protected-access
+    if isinstance(v, variables_lib.PartitionedVariable):
+      v_name = v.name
+    elif v._get_save_slice_info():
+      v_name = v._get_save_slice_info().full_name
+    else:
+      v_name = v.op.name
+    # pylint: enable=protected-access
+    if var_name is None:
+      var_name = v_name
+    elif v_name != var_name:
+      raise TypeError("`var` = %s passed as arg violates the constraints.  "
+                      "Found names %s and %s." % (var, var_name, v_name))
+  return var_name
 
 
 def _warmstart_var(var, prev_ckpt, prev_tensor_name=None):
@@ -257,26 +337,89 @@ def _warmstart_var(var, prev_ckpt, prev_tensor_name=None):
     prev_tensor_name: Name of the tensor to lookup in provided `prev_ckpt`. If
       None, we lookup tensor with same name as given `var`.
   """
-  if _is_variable(var):
-    current_var_name = _infer_var_name([var])
-  elif isinstance(var, list) and all(_is_variable(v) for v in var):
-    current_var_name = _infer_var_name(var)
-  elif isinstance(var, variables_lib.PartitionedVariable):
-    current_var_name = _infer_var_name([var])
-    var = var._get_variable_list()  # pylint: disable=protected-access
-  else:
-    raise TypeError(
-        "var MUST be one of the following: a Variable, list of Variable or "
-        "PartitionedVariable, but is {}".format(type(var)))
+  var_list = _get_var_list(var)
   if not prev_tensor_name:
     # Assume tensor name remains the same.
-    prev_tensor_name = current_var_name
-  checkpoint_utils.init_from_checkpoint(prev_ckpt, {prev_tensor_name: var})
+    prev_tensor_name = _infer_var_name(var_list)
+  # A single variable is passed as is, partitions as a list of slices.
+  if not _is_variable(var):
+    var = var_list
+  _warmstart_vars(_get_checkpoint_file(prev_ckpt), [(prev_tensor_name, var)])
 
 
 # pylint: disable=protected-access
 # Accesses protected members of tf.Variable to reset the variable's internal
 # state.
+def _set_initializer_op(var, value):
+  """Makes `var`'s initializer assign `value` to it instead."""
+  if isinstance(var, resource_variable_ops.ResourceVariable):
+    # Unlike `ResourceVariable.assign`, this does not add a read of the newly
+    # assigned value, and (like the variable's own initializer) is an op.
+    var._initializer_op = resource_variable_ops.assign_variable_op(
+        var.handle, value)
+  else:
+    var._initializer_op = state_ops.assign(var, value)
+
+
+def _warmstart_vars(prev_ckpt_file, prev_tensor_name_and_var):
+  """Warm-starts given variables from tensors in `prev_ckpt_file`.
+
+  The checkpoint's metadata is read once, and a single `RestoreV2` op is built
+  per device for all the variables (or slices) placed on it, rather than one
+  per variable slice.
+
+  Args:
+    prev_ckpt_file: Path to the checkpoint.
+    prev_tensor_name_and_var: List of `(prev_tensor_name, var)` tuples, where
+      `var` is either a `Variable` or a list of `Variable`s which must be slices
+      of the same larger variable, to be initialized with tensor
+      `prev_tensor_name` from `prev_ckpt_file`.
+
+  Raises:
+    ValueError: If a tensor is not found in the checkpoint, or its shape does
+      not match that of the unpartitioned variable to initialize.
+  """
+  variable_map = checkpoint_utils.load_checkpoint(
+      prev_ckpt_file).get_variable_to_shape_map()
+  device_to_restores = collections.OrderedDict()
+  for prev_tensor_name, var in prev_tensor_name_and_var:
+    if prev_tensor_name not in variable_map:
+      raise ValueError("Tensor %s is not found in %s checkpoint %s" %
+                       (prev_tensor_name, prev_ckpt_file, variable_map))
+    if _is_variable(var):
+      if not var.get_shape().is_compatible_with(
+          variable_map[prev_tensor_name]):
+        raise ValueError(
+            "Shape of variable %s (%s) doesn't match with shape of "
+            "tensor %s (%s) from checkpoint reader." %
+            (var.name, str(var.get_shape()), prev_tensor_name,
+             str(variable_map[prev_tensor_name])))
+      var_name = var.name
+      slices = [(var, "")]
+    else:
+      var_name = ",".join([v.name for v in var])
+      slices = [(v, v._save_slice_info.spec) for v in var]
+    for v, slice_spec in slices:
+      device_to_restores.setdefault(v.device, []).append(
+          (v, prev_tensor_name, slice_spec))
+    logging.info("Initialize variable %s from checkpoint %s with %s",
+                 var_name, prev_ckpt_file, prev_tensor_name)
+
+  for device, restores in six.iteritems(device_to_restores):
+    restore_vars, tensor_names, slice_specs = zip(*restores)
+    # `RestoreV2` only has a CPU kernel, so it is placed on the CPU of the
+    # device (e.g. task) holding the variables.
+    with ops.device(device), ops.device("/cpu:0"):
+      restored_tensors = io_ops.restore_v2(
+          prev_ckpt_file,
+          list(tensor_names),
+          list(slice_specs), [v.dtype.base_dtype for v in restore_vars],
+          name="checkpoint_initializer")
+    for v, restored_tensor in zip(restore_vars, restored_tensors):
+      with ops.colocate_with(v):
+        _set_initializer_op(v, restored_tensor)
+
+
 def _warmstart_var_with_vocab(var,
                               current_vocab_path,
                               current_vocab_size,
@@ -285,7 +428,10 @@ def _warmstart_var_with_vocab(var,
                               previous_vocab_size=-1,
                               current_oov_buckets=0,
                               prev_tensor_name=None,
-                              initializer=None):
+                              initializer=None,
+                              max_rows_in_memory=-1,
+                              row_remapping=None,
+                              prev_ckpt_file=None):
   """Warm-starts given variable from `prev_tensor_name` tensor in `prev_ckpt`.
 
   Use this method when the `var` is backed by vocabulary. This method stitches
@@ -316,56 +462,72 @@ def _warmstart_var_with_vocab(var,
       None, we lookup tensor with same name as given `var`.
     initializer: Variable initializer to be used for missing entries.  If None,
       missing entries will be zero-initialized.
+    max_rows_in_memory: An `int` specifying the maximum number of rows of the
+      tensor in `prev_ckpt` to load at once. If less than or equal to 0, the
+      entire tensor is loaded into memory at once.
+    row_remapping: Optional 1-D int64 `Tensor` remapping the current vocab to
+      the previous one, as returned by `checkpoint_ops._generate_row_remapping`.
+      If None, it is generated from the vocab files.
+    prev_ckpt_file: Optional path to the checkpoint `prev_ckpt` resolves to, as
+      returned by `_get_checkpoint_file`. If None, `prev_ckpt` is resolved here.
 
   Raises:
-    ValueError: If required args are not provided.
+    ValueError: If required args are not provided, or `prev_ckpt` is a
+      directory with no checkpoints.
   """
   if not (current_vocab_path and current_vocab_size and prev_ckpt and
           prev_vocab_path):
     raise ValueError("Invalid args: Must provide all of [current_vocab_path, "
                      "current_vocab_size, prev_ckpt, prev_vocab_path}.")
-  if _is_variable(var):
-    var = [var]
-  elif isinstance(var, list) and all(_is_variable(v) for v in var):
-    var = var
-  elif isinstance(var, variables_lib.PartitionedVariable):
-    var = var._get_variable_list()
-  else:
-    raise TypeError(
-        "var MUST be one of the following: a Variable, list of Variable or "
-        "PartitionedVariable, but is {}".format(type(var)))
+  var = _get_var_list(var)
 
   if not prev_tensor_name:
     # Assume tensor name remains the same.
     prev_tensor_name = _infer_var_name(var)
 
+  # Resolve the checkpoint once for all partitions of `var`, unless the caller
+  # already did.
+  if prev_ckpt_file is None:
+    prev_ckpt_file = _get_checkpoint_file(prev_ckpt)
+  # All partitions share the same vocabularies and checkpoint tensor, so the
+  # full (unpartitioned) matrix is loaded and remapped once, and each partition
+  # is initialized from its slice of it.  This reads the vocab files and the
+  # checkpoint tensor once, instead of once per partition.
+  slice_info = var[0]._get_save_slice_info()
+  if slice_info:
+    full_shape = list(slice_info.full_shape)
+  else:
+    full_shape = var[0].get_shape().as_list()
+
+  # TODO(vihanjain): Support _WarmstartSettings where class vocabularies need
+  # remapping too.
+  init = checkpoint_ops._load_and_remap_matrix_initializer_with_row_remapping(
+      ckpt_path=prev_ckpt_file,
+      old_tensor_name=prev_tensor_name,
+      new_row_vocab_size=current_vocab_size,
+      new_col_vocab_size=full_shape[1],
+      old_row_vocab_size=previous_vocab_size,
+      old_row_vocab_file=prev_vocab_path,
+      new_row_vocab_file=current_vocab_path,
+      old_col_vocab_file=None,
+      new_col_vocab_file=None,
+      num_row_oov_buckets=current_oov_buckets,
+      num_col_oov_buckets=0,
+      initializer=initializer,
+      max_rows_in_memory=max_rows_in_memory,
+      full_row_remapping=row_remapping)
+  full_init_val = init(shape=full_shape)
+
   for v in var:
     v_shape = v.get_shape().as_list()
-    slice_info = v._get_save_slice_info()
-    partition_info = None
-    if slice_info:
-      partition_info = variable_scope._PartitionInfo(
-          full_shape=slice_info.full_shape,
-          var_offset=slice_info.var_offset)
-
-    # TODO(vihanjain): Support _WarmstartSettings where class vocabularies need
-    # remapping too.
-    init = checkpoint_ops._load_and_remap_matrix_initializer(
-        ckpt_path=checkpoint_utils._get_checkpoint_filename(prev_ckpt),
-        old_tensor_name=prev_tensor_name,
-        new_row_vocab_size=current_vocab_size,
-        new_col_vocab_size=v_shape[1],
-        old_row_vocab_size=previous_vocab_size,
-        old_row_vocab_file=prev_vocab_path,
-        new_row_vocab_file=current_vocab_path,
-        old_col_vocab_file=None,
-        new_col_vocab_file=None,
-        num_row_oov_buckets=current_oov_buckets,
-        num_col_oov_buckets=0,
-        initializer=initializer)
-    new_init_val = ops.convert_to_tensor(
-        init(shape=v_shape, partition_info=partition_info))
-    v._initializer_op = state_ops.assign(v, new_init_val)
+    new_init_val = full_init_val
+    # Only actual partitions need to slice the full value; a variable that
+    # covers the full shape (unpartitioned, or a single partition) is assigned
+    # the full value directly.
+    if v_shape != full_shape:
+      new_init_val = array_ops.slice(
+          full_init_val, v._get_save_slice_info().var_offset, v_shape)
+    _set_initializer_op(v, new_init_val)
 # pylint: enable=protected-access
 
 
@@ -378,35 +540,66 @@ def _warmstart(warmstart_settings):
   Args:
     warmstart_settings: An object of `_WarmStartSettings`.
   """
+  # The checkpoint (e.g. the latest one in a directory) is resolved once, when
+  # the first variable to warm-start is found, rather than once per variable.
+  ckpt_file = None
   # We have to deal with partitioned variables, since get_collection flattens
   # out the list.
   grouped_variables = {}
   # Both warmstart_settings.vars_to_warmstart = '.*' and
   # warmstart_settings.vars_to_warmstart = None will match everything here.
-  for v in ops.get_collection(ops.GraphKeys.TRAINABLE_VARIABLES,
-                              scope=warmstart_settings.vars_to_warmstart):
-    if not isinstance(v, list):
-      var_name = _infer_var_name([v])
-    else:
-      var_name = _infer_var_name(v)
+  # The pattern is compiled once and applied with `re.match` on the variable
+  # name, as `ops.get_collection(..., scope=...)` does.
+  vars_to_warmstart_re = None
+  if warmstart_settings.vars_to_warmstart:
+    vars_to_warmstart_re = re.compile(warmstart_settings.vars_to_warmstart)
+  for v in ops.get_collection_ref(ops.GraphKeys.TRAINABLE_VARIABLES):
+    if vars_to_warmstart_re and not (
+        hasattr(v, "name") and vars_to_warmstart_re.match(v.name)):
+      continue
+    if not _is_variable(v):
+      raise TypeError("Expected only `Variable`s in the TRAINABLE_VARIABLES "
+                      "collection, found {} of type {}.".format(v, type(v)))
+    # Group directly on the variable object: partitions of the same variable
+    # share the full name in their slice info, and any other variable is keyed
+    # on its own op name.
+    slice_info = v._get_save_slice_info()  # pylint: disable=protected-access
+    var_name = slice_info.full_name if slice_info else v.op.name
     grouped_variables.setdefault(var_name, []).append(v)
+  # Variables without a vocabulary are collected, so that they can all be
+  # restored with a single op per device.
+  prev_tensor_name_and_var = []
+  # Variables warm-started with the same pair of vocabularies (e.g. the
+  # embedding and linear weights of one feature column) share one remapping,
+  # so that the vocab files are read only once.
+  vocabs_to_row_remapping = {}
+  var_name_to_prev_var_name = warmstart_settings.var_name_to_prev_var_name
+  var_name_to_vocab_info = warmstart_settings.var_name_to_vocab_info
   for var_name, variable in six.iteritems(grouped_variables):
-    prev_var_name = warmstart_settings.var_name_to_prev_var_name.get(var_name)
-    vocab_info = warmstart_settings.var_name_to_vocab_info.get(var_name)
+    prev_var_name = var_name_to_prev_var_name.get(var_name)
+    vocab_info = var_name_to_vocab_info.get(var_name)
     if vocab_info:
+      prev_vocab_size = (vocab_info.old_vocab_size
+                         if vocab_info.old_vocab_size > 0 else "All")
       logging.info(
-          "Warm-starting variable: {}; current_vocab: {} current_vocab_size: {}"
-          " prev_vocab: {} prev_vocab_size: {} current_oov: {} prev_tensor: {}"
-          " initializer: {}".format(
-              var_name,
-              vocab_info.new_vocab,
-              vocab_info.new_vocab_size,
-              vocab_info.old_vocab,
-              (vocab_info.old_vocab_size if vocab_info.old_vocab_size > 0
-               else "All"),
-              vocab_info.num_oov_buckets,
-              prev_var_name or "Unchanged",
-              vocab_info.backup_initializer or "zero-initialized"))
+          "Warm-starting variable: %s; current_vocab: %s current_vocab_size: %s"
+          " prev_vocab: %s prev_vocab_size: %s current_oov: %s prev_tensor: %s"
+          " initializer: %s", var_name, vocab_info.new_vocab,
+          vocab_info.new_vocab_size, vocab_info.old_vocab, prev_vocab_size,
+          vocab_info.num_oov_buckets, prev_var_name or "Unchanged",
+          vocab_info.backup_initializer or "zero-initialized")
+      if ckpt_file is None:
+        ckpt_file = _get_checkpoint_file(
+            warmstart_settings.ckpt_to_initialize_from)
+      vocabs = (vocab_info.new_vocab, vocab_info.new_vocab_size,
+                vocab_info.old_vocab, vocab_info.old_vocab_size)
+      if vocabs not in vocabs_to_row_remapping:
+        vocabs_to_row_remapping[vocabs] = (
+            checkpoint_ops._generate_row_remapping(  # pylint: disable=protected-access
+                new_row_vocab_file=vocab_info.new_vocab,
+                new_row_vocab_size=vocab_info.new_vocab_size,
+                old_row_vocab_file=vocab_info.old_vocab,
+                old_row_vocab_size=vocab_info.old_vocab_size))
       _warmstart_var_with_vocab(
           variable,
           current_vocab_path=vocab_info.new_vocab,
@@ -416,17 +609,25 @@ def _warmstart(warmstart_settings):
           previous_vocab_size=vocab_info.old_vocab_size,
           current_oov_buckets=vocab_info.num_oov_buckets,
           prev_tensor_name=prev_var_name,
-          initializer=vocab_info.backup_initializer)
+          initializer=vocab_info.backup_initializer,
+          max_rows_in_memory=vocab_info.max_rows_in_memory,
+          row_remapping=vocabs_to_row_remapping[vocabs],
+          prev_ckpt_file=ckpt_file)
     else:
       # For the special value of warmstart_settings.vars_to_warmstart = None,
       # we only warmstart variables with explicitly specified vocabularies.
       if warmstart_settings.vars_to_warmstart:
-        logging.info("Warm-starting variable: {}; prev_var_name: {}".format(
-            var_name, prev_var_name or "Unchanged"))
+        logging.info("Warm-starting variable: %s; prev_var_name: %s",
+                     var_name, prev_var_name or "Unchanged")
         # Because we use a default empty list in grouped_variables, single
         # unpartitioned variables will be lists here, which we rectify in order
-        # for init_from_checkpoint logic to work correctly.
+        # for _warmstart_vars to restore them as unpartitioned variables.
         if len(variable) == 1:
           variable = variable[0]
-        _warmstart_var(variable, warmstart_settings.ckpt_to_initialize_from,
-                       prev_var_name)
+        # Assume tensor name remains the same if not explicitly provided.
+        prev_tensor_name_and_var.append((prev_var_name or var_name, variable))
+  if prev_tensor_name_and_var:
+    if ckpt_file is None:
+      ckpt_file = _get_checkpoint_file(
+          warmstart_settings.ckpt_to_initialize_from)
+    _warmstart_vars(ckpt_file, prev_tensor_name_and_var)
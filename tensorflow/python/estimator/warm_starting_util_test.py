@@ -31,6 +31,7 @@ from tensorflow.python.ops import init_ops
 from tensorflow.python.ops import variable_scope
 from tensorflow.python.ops import variables
 from tensorflow.python.platform import test
+from tensorflow.python.training import device_setter
 from tensorflow.python.training import saver as saver_lib
 
 ones = init_ops.ones_initializer
@@ -191,6 +192,28 @@ class WarmStartingUtilTest(test.TestCase):
         self.assertAllEqual([[2.], [1.5], [1.], [0.5], [0.]],
                             fruit_weights.eval(sess))
 
+  def testWarmStartResourceVarWithVocab(self):
+    prev_vocab_path = self._write_vocab(["apple", "banana", "guava", "orange"],
+                                        "old_vocab")
+    self._create_prev_run_var(
+        "fruit_weights", initializer=[[0.5], [1.], [1.5], [2.]])
+
+    # New vocab with elements in reverse order and one new element.
+    new_vocab_path = self._write_vocab(
+        ["orange", "guava", "banana", "apple", "raspberry"], "new_vocab")
+    # New session and new graph.
+    with ops.Graph().as_default() as g:
+      with self.test_session(graph=g) as sess:
+        fruit_weights = variable_scope.get_variable(
+            "fruit_weights",
+            initializer=[[0.], [0.], [0.], [0.], [0.]],
+            use_resource=True)
+        ws_util._warmstart_var_with_vocab(fruit_weights, new_vocab_path, 5,
+                                          self.get_temp_dir(), prev_vocab_path)
+        sess.run(variables.global_variables_initializer())
+        self.assertAllEqual([[2.], [1.5], [1.], [0.5], [0.]],
+                            sess.run(fruit_weights))
+
   def testWarmStartVarWithVocabConstrainedOldVocabSize(self):
     prev_vocab_path = self._write_vocab(["apple", "banana", "guava", "orange"],
                                         "old_vocab")
@@ -296,6 +319,10 @@ class WarmStartingUtilTest(test.TestCase):
             partitioner=lambda shape, dtype: [2, 1])
         ws_util._warmstart_var_with_vocab(fruit_weights, new_vocab_path, 6,
                                           self.get_temp_dir(), prev_vocab_path)
+        # The full matrix is loaded once, rather than once per partition.
+        self.assertEqual(1, len([
+            op for op in g.get_operations() if op.type == "LoadAndRemapMatrix"
+        ]))
         sess.run(variables.global_variables_initializer())
         self.assertTrue(
             isinstance(fruit_weights, variables.PartitionedVariable))
@@ -305,6 +332,154 @@ class WarmStartingUtilTest(test.TestCase):
         self.assertAllEqual([[0.5], [0.], [0.]],
                             fruit_weights_vars[1].eval(sess))
 
+  def testWarmStartVarWithVocabBothVarsPartitionedChunked(self):
+    prev_vocab_path = self._write_vocab(["apple", "banana", "guava", "orange"],
+                                        "old_vocab")
+    self._create_prev_run_var(
+        "fruit_weights",
+        shape=[4, 1],
+        initializer=[[0.5], [1.], [1.5], [2.]],
+        partitioner=lambda shape, dtype: [2, 1])
+
+    # New vocab with elements in reverse order and two new elements.
+    new_vocab_path = self._write_vocab(
+        ["orange", "guava", "banana", "apple", "raspberry",
+         "blueberry"], "new_vocab")
+    # New session and new graph.
+    with ops.Graph().as_default() as g:
+      with self.test_session(graph=g) as sess:
+        fruit_weights = variable_scope.get_variable(
+            "fruit_weights",
+            shape=[6, 1],
+            initializer=[[0.], [0.], [0.], [0.], [0.], [0.]],
+            partitioner=lambda shape, dtype: [2, 1])
+        # Load the old tensor from the checkpoint one row at a time.
+        vocab_info = ws_util._VocabInfo(
+            new_vocab=new_vocab_path,
+            new_vocab_size=6,
+            num_oov_buckets=0,
+            old_vocab=prev_vocab_path,
+            max_rows_in_memory=1)
+        ws_util._warmstart(
+            ws_util._WarmStartSettings(
+                self.get_temp_dir(),
+                var_name_to_vocab_info={"fruit_weights": vocab_info}))
+        load_ops = [
+            op for op in g.get_operations() if op.type == "LoadAndRemapMatrix"
+        ]
+        self.assertEqual(1, len(load_ops))
+        self.assertEqual(1, load_ops[0].get_attr("max_rows_in_memory"))
+        sess.run(variables.global_variables_initializer())
+        fruit_weights_vars = fruit_weights._get_variable_list()
+        self.assertAllEqual([[2.], [1.5], [1.]],
+                            fruit_weights_vars[0].eval(sess))
+        self.assertAllEqual([[0.5], [0.], [0.]],
+                            fruit_weights_vars[1].eval(sess))
+
+  def testWarmStartSamePrevVarForMultipleVars(self):
+    _, prev_val = self._create_prev_run_var(
+        "fruit_weights", initializer=[[0.5], [1.], [1.5], [2.]])
+
+    with ops.Graph().as_default() as g:
+      with self.test_session(graph=g) as sess:
+        fruit_weights = variable_scope.get_variable(
+            "fruit_weights", initializer=[[0.], [0.], [0.], [0.]])
+        other_weights = variable_scope.get_variable(
+            "other_weights",
+            shape=[4, 1],
+            initializer=ones(),
+            partitioner=lambda shape, dtype: [2, 1])
+        ws_util._warmstart(
+            ws_util._WarmStartSettings(
+                self.get_temp_dir(),
+                var_name_to_prev_var_name={"other_weights": "fruit_weights"}))
+        # All variables (and slices) are on the same device, and are restored
+        # by a single op.
+        self.assertEqual(1, len([
+            op for op in g.get_operations() if op.type == "RestoreV2"]))
+        sess.run(variables.global_variables_initializer())
+        # Both variables are warm-started from the same checkpoint tensor.
+        self.assertAllEqual(prev_val, fruit_weights.eval(sess))
+        other_weights_vars = other_weights._get_variable_list()
+        self.assertAllEqual(prev_val[:2], other_weights_vars[0].eval(sess))
+        self.assertAllEqual(prev_val[2:], other_weights_vars[1].eval(sess))
+
+  def testWarmStartVarsRestoredPerDevice(self):
+    self._create_prev_run_var(
+        "fruit_weights", initializer=[[0.5], [1.], [1.5], [2.]])
+
+    # Only the graph is checked, since the devices don't exist locally.
+    with ops.Graph().as_default() as g:
+      # Places the two partitions on /job:ps/task:0 and /job:ps/task:1.
+      with ops.device(device_setter.replica_device_setter(ps_tasks=2)):
+        fruit_weights = variable_scope.get_variable(
+            "fruit_weights",
+            shape=[4, 1],
+            initializer=ones(),
+            partitioner=lambda shape, dtype: [2, 1])
+      ws_util._warmstart(ws_util._WarmStartSettings(self.get_temp_dir()))
+      restore_ops = [
+          op for op in g.get_operations() if op.type == "RestoreV2"
+      ]
+      self.assertItemsEqual(
+          ["/job:ps/task:0/device:CPU:0", "/job:ps/task:1/device:CPU:0"],
+          [op.device for op in restore_ops])
+      for v in fruit_weights._get_variable_list():
+        self.assertEqual(v.op.colocation_groups(),
+                         v._initializer_op.colocation_groups())
+
+  def testWarmStartVarsWithSameVocabShareRemapping(self):
+    prev_vocab_path = self._write_vocab(["apple", "banana", "guava", "orange"],
+                                        "old_vocab")
+    with ops.Graph().as_default() as g:
+      with self.test_session(graph=g) as sess:
+        variable_scope.get_variable(
+            "fruit_weights", initializer=[[0.5], [1.], [1.5], [2.]])
+        variable_scope.get_variable(
+            "fruit_embeddings",
+            initializer=[[0.5, 0.4], [1., 1.1], [1.5, 1.6], [2., 2.1]])
+        self._write_checkpoint(sess)
+
+    # New vocab with elements in reverse order and one new element.
+    new_vocab_path = self._write_vocab(
+        ["orange", "guava", "banana", "apple", "raspberry"], "new_vocab")
+    # New session and new graph.
+    with ops.Graph().as_default() as g:
+      with self.test_session(graph=g) as sess:
+        fruit_weights = variable_scope.get_variable(
+            "fruit_weights", initializer=[[0.], [0.], [0.], [0.], [0.]])
+        fruit_embeddings = variable_scope.get_variable(
+            "fruit_embeddings",
+            shape=[5, 2],
+            initializer=ones(),
+            partitioner=lambda shape, dtype: [2, 1])
+        vocab_info = ws_util._VocabInfo(
+            new_vocab=new_vocab_path,
+            new_vocab_size=5,
+            num_oov_buckets=0,
+            old_vocab=prev_vocab_path)
+        ws_util._warmstart(
+            ws_util._WarmStartSettings(
+                self.get_temp_dir(),
+                var_name_to_vocab_info={
+                    "fruit_weights": vocab_info,
+                    "fruit_embeddings": vocab_info
+                }))
+        # Both variables use the same vocabularies, so a single remapping is
+        # generated for them.
+        self.assertEqual(1, len([
+            op for op in g.get_operations()
+            if op.type == "GenerateVocabRemapping"
+        ]))
+        sess.run(variables.global_variables_initializer())
+        self.assertAllEqual([[2.], [1.5], [1.], [0.5], [0.]],
+                            fruit_weights.eval(sess))
+        fruit_embeddings_vars = fruit_embeddings._get_variable_list()
+        self.assertAllClose([[2., 2.1], [1.5, 1.6], [1., 1.1]],
+                            fruit_embeddings_vars[0].eval(sess))
+        self.assertAllClose([[0.5, 0.4], [0., 0.]],
+                            fruit_embeddings_vars[1].eval(sess))
+
   def testWarmStart_SparseColumnIntegerized(self):
     # Create feature column.
     sc_int = fc.categorical_column_with_identity("sc_int", num_buckets=10)
@@ -977,6 +1152,24 @@ class WarmStartingUtilTest(test.TestCase):
                 ]
             }, sess)
 
+  def testInferVarName(self):
+    with ops.Graph().as_default():
+      fruit_weights = variable_scope.get_variable(
+          "fruit_weights", shape=[3, 1], initializer=ones())
+      sc_vocab = variable_scope.get_variable(
+          "sc_vocab",
+          shape=[4, 1],
+          initializer=ones(),
+          partitioner=lambda shape, dtype: [2, 1])
+      self.assertEqual("fruit_weights",
+                       ws_util._infer_var_name([fruit_weights]))
+      self.assertEqual("sc_vocab", ws_util._infer_var_name([sc_vocab]))
+      self.assertEqual("sc_vocab",
+                       ws_util._infer_var_name(sc_vocab._get_variable_list()))
+      # Slices of different variables do not have a single name.
+      self.assertRaises(TypeError, ws_util._infer_var_name,
+                        [fruit_weights] + sc_vocab._get_variable_list())
+
   def testErrorConditions(self):
     self.assertRaises(ValueError, ws_util._WarmStartSettings, None)
     x = variable_scope.get_variable(
@@ -43,7 +43,8 @@ def _load_and_remap_matrix(ckpt_path,
                            new_col_vocab_file=None,
                            num_row_oov_buckets=0,
                            num_col_oov_buckets=0,
-                           max_rows_in_memory=-1):
+                           max_rows_in_memory=-1,
+                           full_row_remapping=None):
   """Loads a 2-D (matrix) `Tensor` from checkpoint.
 
   Generates 1D-remappings for rows and columns using the
@@ -106,6 +107,11 @@ def _load_and_remap_matrix(ckpt_path,
       the checkpoint at once. If less than or equal to 0, the entire matrix will
       be loaded into memory. Setting this arg trades increased disk reads for
       lower memory usage.
+    full_row_remapping: Optional 1-D int64 `Tensor` remapping every entry of
+      `new_row_vocab_file` to its row in the old matrix (or -1 if missing), as
+      returned by `_generate_row_remapping`. If provided, the rows to load are
+      sliced out of it instead of generating a new remapping from the row vocab
+      files, so that several matrices can share one read of the vocabularies.
 
   Returns:
     A Tensor of shape `[num_rows_to_load + num_row_oov_buckets,
@@ -147,7 +153,12 @@ def _load_and_remap_matrix(ckpt_path,
         "instead.")
 
   num_rows_present = num_rows_to_load
-  if remap_rows:
+  if remap_rows and full_row_remapping is not None:
+    row_remapping = array_ops.slice(full_row_remapping, [new_row_vocab_offset],
+                                    [num_rows_to_load])
+    num_rows_present = math_ops.reduce_sum(
+        math_ops.cast(math_ops.greater_equal(row_remapping, 0), dtypes.int32))
+  elif remap_rows:
     row_remapping, num_rows_present = (
         gen_checkpoint_ops._generate_vocab_remapping(  # pylint: disable=protected-access
             new_vocab_file=new_row_vocab_file,
@@ -325,6 +336,68 @@ def _load_and_remap_matrix_initializer(ckpt_path,
     `[new_row_vocab_size + num_row_oov_buckets, new_col_vocab_size +
     num_col_oov_buckets]`.
 
+  Raises:
+    TypeError: If `initializer` is specified but not callable.
+  """
+  return _load_and_remap_matrix_initializer_with_row_remapping(
+      ckpt_path=ckpt_path,
+      old_tensor_name=old_tensor_name,
+      new_row_vocab_size=new_row_vocab_size,
+      new_col_vocab_size=new_col_vocab_size,
+      old_row_vocab_size=old_row_vocab_size,
+      old_row_vocab_file=old_row_vocab_file,
+      new_row_vocab_file=new_row_vocab_file,
+      old_col_vocab_file=old_col_vocab_file,
+      new_col_vocab_file=new_col_vocab_file,
+      num_row_oov_buckets=num_row_oov_buckets,
+      num_col_oov_buckets=num_col_oov_buckets,
+      initializer=initializer,
+      max_rows_in_memory=max_rows_in_memory)
+
+
+def _load_and_remap_matrix_initializer_with_row_remapping(
+    ckpt_path,
+    old_tensor_name,
+    new_row_vocab_size,
+    new_col_vocab_size,
+    old_row_vocab_size=-1,
+    old_row_vocab_file=None,
+    new_row_vocab_file=None,
+    old_col_vocab_file=None,
+    new_col_vocab_file=None,
+    num_row_oov_buckets=0,
+    num_col_oov_buckets=0,
+    initializer=None,
+    max_rows_in_memory=-1,
+    full_row_remapping=None):
+  """Returns a var initializer for loading and remapping a 2-D (matrix) tensor.
+
+  Same as `_load_and_remap_matrix_initializer`, except that the row remapping
+  can be provided instead of being generated from the row vocab files.
+
+  Args:
+    ckpt_path: See `_load_and_remap_matrix_initializer`.
+    old_tensor_name: See `_load_and_remap_matrix_initializer`.
+    new_row_vocab_size: See `_load_and_remap_matrix_initializer`.
+    new_col_vocab_size: See `_load_and_remap_matrix_initializer`.
+    old_row_vocab_size: See `_load_and_remap_matrix_initializer`.
+    old_row_vocab_file: See `_load_and_remap_matrix_initializer`.
+    new_row_vocab_file: See `_load_and_remap_matrix_initializer`.
+    old_col_vocab_file: See `_load_and_remap_matrix_initializer`.
+    new_col_vocab_file: See `_load_and_remap_matrix_initializer`.
+    num_row_oov_buckets: See `_load_and_remap_matrix_initializer`.
+    num_col_oov_buckets: See `_load_and_remap_matrix_initializer`.
+    initializer: See `_load_and_remap_matrix_initializer`.
+    max_rows_in_memory: See `_load_and_remap_matrix_initializer`.
+    full_row_remapping: Optional 1-D int64 `Tensor` remapping every entry of
+      `new_row_vocab_file` to its row in the old matrix, as returned by
+      `_generate_row_remapping`. If provided, it is used instead of generating
+      a remapping from the row vocab files.
+
+  Returns:
+    A variable initializer function, as for
+    `_load_and_remap_matrix_initializer`.
+
   Raises:
     TypeError: If `initializer` is specified but not callable.
   """
@@ -410,11 +483,48 @@ def _load_and_remap_matrix_initializer(ckpt_path,
         new_col_vocab_file=new_col_vocab_file,
         num_row_oov_buckets=row_oov_buckets_to_use,
         num_col_oov_buckets=num_col_oov_buckets,
-        max_rows_in_memory=max_rows_in_memory)
+        max_rows_in_memory=max_rows_in_memory,
+        full_row_remapping=full_row_remapping)
 
   return _initializer
 
 
+def _generate_row_remapping(new_row_vocab_file,
+                            new_row_vocab_size,
+                            old_row_vocab_file,
+                            old_row_vocab_size=-1):
+  """Returns a remapping of a full new row vocabulary to old row ids.
+
+  The result can be passed as `full_row_remapping` to
+  `_load_and_remap_matrix_initializer_with_row_remapping` for every matrix that
+  is remapped with the same pair of vocabularies, so that the vocab files are
+  only read once.
+
+  Args:
+    new_row_vocab_file: A scalar `Tensor` of type `string` containing the path
+      to the new row vocabulary file.
+    new_row_vocab_size: `int` specifying the number of entries in
+      `new_row_vocab_file` to remap.
+    old_row_vocab_file: A scalar `Tensor` of type `string` containing the path
+      to the old row vocabulary file.
+    old_row_vocab_size: The number of entries to consider in the old vocabulary.
+      With the default value of -1, the entire old row vocabulary file will be
+      used.
+
+  Returns:
+    A 1-D int64 `Tensor` of size `new_row_vocab_size`, holding for each new
+    row id the corresponding old row id, or -1 if the entry is not in the old
+    vocabulary.
+  """
+  row_remapping, _ = gen_checkpoint_ops._generate_vocab_remapping(  # pylint: disable=protected-access
+      new_vocab_file=new_row_vocab_file,
+      old_vocab_file=old_row_vocab_file,
+      new_vocab_offset=0,
+      num_new_vocab=new_row_vocab_size,
+      old_vocab_size=old_row_vocab_size)
+  return row_remapping
+
+
 def _load_embedding_initializer(ckpt_path,
                                 embedding_tensor_name,
                                 new_vocab_size,
@@ -117,6 +117,43 @@ class LoadAndRemapWrappersTest(test.TestCase):
     with self.test_session():
       self.assertAllClose(expected_remapped_matrix, remapped_matrix.eval())
 
+  def test_load_and_remap_matrix_with_full_row_remapping(self):
+    """Tests loading with a row remapping generated for the full vocab."""
+    full_row_remapping = checkpoint_ops._generate_row_remapping(
+        new_row_vocab_file=self.new_feature_vocab_file,
+        new_row_vocab_size=5,
+        old_row_vocab_file=self.old_feature_vocab_file)
+    remapped_matrix = checkpoint_ops._load_and_remap_matrix(
+        new_row_vocab_file=self.new_feature_vocab_file,
+        old_row_vocab_file=self.old_feature_vocab_file,
+        num_rows_to_load=4,
+        new_col_vocab_file=self.new_class_vocab_file,
+        old_col_vocab_file=self.old_class_vocab_file,
+        new_col_vocab_size=4,
+        old_tensor_name='some_scope/embeddings',
+        ckpt_path=[self.checkpoint_file],
+        new_row_vocab_offset=1,
+        initializer=self.initializer,
+        num_row_oov_buckets=1,
+        num_col_oov_buckets=1,
+        full_row_remapping=full_row_remapping)
+
+    # Same as in test_load_and_remap_matrix, since the rows to load are sliced
+    # out of the full remapping at the same offset.
+    expected_remapped_matrix = np.concatenate(
+        [
+            np.reshape([18, 34, 50, self.init_val, self.init_val], [5, 1]),
+            np.reshape([16, 32, 48, self.init_val, self.init_val], [5, 1]),
+            np.reshape([self.init_val] * 5, [5, 1]),
+            np.reshape([17, 33, 49, self.init_val, self.init_val], [5, 1]),
+            np.reshape([self.init_val] * 5, [5, 1])
+        ],
+        axis=1)
+
+    with self.test_session():
+      self.assertAllEqual([0, 1, 2, 3, -1], full_row_remapping.eval())
+      self.assertAllClose(expected_remapped_matrix, remapped_matrix.eval())
+
   def test_load_and_remap_output_layer_weight_initializer_linear(self):
     """Tests for the output layer initializer in the linear multi-class case."""
     loading_initializer = (checkpoint_ops._load_and_remap_matrix_initializer(